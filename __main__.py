@@ -0,0 +1,8 @@
+'''
+Lets the timecard checkout be run directly, e.g. python3 path/to/timecard
+'''
+import timecard
+from interface import main
+
+
+main(timecard)
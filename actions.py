@@ -0,0 +1,163 @@
+'''
+Action handlers for the Timecard command line interface, imported only once the
+interface has worked out which action was asked for
+'''
+from interface import (
+    END_OF_REPORT,
+    check_timecard_record,
+    display_punch_report,
+    display_single_punch,
+    display_single_timecard,
+    display_time_worked_report,
+    display_timecard_records,
+    display_timecard_report_header,
+    format_duration,
+    get_timecard_for_current_user,
+    interpret_conditional_boolean,
+    select_timecard,
+    select_timecard_record,
+)
+
+
+def perform_display_timecard(timecard, args):
+    '''Performs the display timecard action'''
+    if not args.timecard_number:
+        title = 'CURRENT TIMECARD'
+    else:
+        title = None
+    display_single_timecard(select_timecard_record(timecard, args), title)
+
+
+def perform_new_timecard(timecard, args):
+    '''Performs the new timecard action'''
+    new_timecard_id = timecard.create_timecard(args.owner, args.description)
+    new_timecard = timecard.get_timecard(new_timecard_id)
+    print('New timecard created:')
+    display_single_timecard(new_timecard, 'Timecard ' + str(new_timecard_id))
+
+
+def perform_finalize_timecard(timecard, args):
+    '''Performs the finalize timecard action'''
+    timecard_id = select_timecard(timecard, args)
+    timecard.finalize_timecard(timecard_id)
+    print(f'Timecard {timecard_id} finalized')
+
+
+def perform_mark_reported(timecard, args):
+    '''Performs the mark timecard as reported action'''
+    timecard_id = select_timecard(timecard, args)
+    if timecard.mark_timecard_reported(timecard_id):
+        print(f'Timecard {timecard_id} marked as reported')
+    else:
+        print(f'Timecard {timecard_id} cannot be reported, not finalized?')
+
+
+def perform_punch(timecard, args):
+    '''Performs the timecard punch action, displays the result'''
+    punch_type = args.punch
+    punch_descr = args.description
+    punch_descr_display = ''
+    if punch_descr:
+        punch_descr_display = ' for ' + punch_descr
+    punch_paid = not args.unpaid
+    paid_display = ''
+    if punch_paid:
+        paid_display = ', paid time'
+    else:
+        paid_display = ', unpaid time'
+    timecard_record = select_timecard_record(timecard, args)
+    check_timecard_record(timecard_record, args.timecard_number)
+    timecard_id = timecard_record['id']
+
+    if punch_type == 'in':
+        if timecard.punch_in(timecard_id, punch_paid, punch_descr):
+            print(f'Punched in on timecard {timecard_id}{punch_descr_display}{paid_display}')
+        else:
+            print(f'Cannot punch in on timecard {timecard_id}')
+    elif punch_type == 'out':
+        if timecard.punch_out(timecard_id):
+            print(f'Punched out on timecard {timecard_id}')
+        else:
+            print(f'Cannot punch out on timecard {timecard_id}')
+    elif punch_type == 'double':
+        timecard.punch_out(timecard_id)
+        timecard.punch_in(timecard_id, punch_paid, punch_descr)
+        print(f'Double punched on timecard {timecard_id}{punch_descr_display}{paid_display}')
+    else:
+        print(f'Unknown punch type: {punch_type}')
+
+
+def perform_get_time_worked(timecard, _args):
+    '''Perform the get time worked function, prints total time worked'''
+    timecard_id = get_timecard_for_current_user(timecard)['id']
+    duration = format_duration(timecard.get_time_worked_today(timecard_id), long=True)
+    print('You have worked for ' + duration + '.')
+
+
+def perform_get_last_active_punch(timecard, args):
+    '''Performs the get last active punch action, prints to stdout'''
+    timecard_record = select_timecard_record(timecard, args)
+    check_timecard_record(timecard_record, args.timecard_number)
+    timecard_id = timecard_record['id']
+    punch = timecard.get_punch(timecard.get_active_punch_id(timecard_id))
+    if punch:
+        display_single_punch(punch, 'ACTIVE PUNCH')
+    else:
+        print('No active punch')
+
+
+def perform_get_last_punch(timecard, args):
+    '''Performs the get last punch action (active or not), prints to stdout'''
+    timecard_record = select_timecard_record(timecard, args)
+    check_timecard_record(timecard_record, args.timecard_number)
+    timecard_id = timecard_record['id']
+    punch = timecard.get_last_punch_by_timecard(timecard_id)
+    if punch:
+        display_single_punch(punch, 'LAST PUNCH')
+    else:
+        print('No punch to show')
+
+
+def perform_list(timecard, args):
+    '''Performs the list timecards function'''
+    # Timecard Retrieval Methods:
+    # - get_timecard
+    # - get_all_timecards
+    # - get_all_timecards_by_owner
+    # - get_active_timecards (true & false)
+    # - get_active_timecards_by_owner (true & false)
+
+    # Filtration:
+    active = interpret_conditional_boolean(args.active)
+    owner = args.owner
+    if owner is not None and active is None:
+        records = timecard.get_all_timecards_by_owner(owner)
+    elif owner is None and active is not None:
+        records = timecard.get_active_timecards(active)
+    elif owner is not None and active is not None:
+        records = timecard.get_active_timecards_by_owner(owner, active)
+    else:
+        records = timecard.get_all_timecards()
+    display_timecard_records(records)
+
+
+def perform_report(timecard, args):
+    '''Performs the print report function'''
+    report_type = args.report
+    show_time_worked = report_type != 'punches'
+    show_punches = report_type != 'timeworked'
+    # Gather everything the report needs in one transaction before rendering any of it:
+    with timecard.batch():
+        timecard_record = select_timecard_record(timecard, args)
+        timecard_id = timecard_record['id']
+        if show_time_worked:
+            work_records = timecard.get_paid_time_summary(timecard_id)
+        if show_punches:
+            punch_records = timecard.get_punches_by_timecard(timecard_id)
+
+    display_timecard_report_header(timecard_record)
+    if show_time_worked:
+        display_time_worked_report(work_records)
+    if show_punches:
+        display_punch_report(punch_records)
+    print(END_OF_REPORT)
@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+'''
+Checks the interface's argparse fast path against argparse itself: every command line
+_fast_parse takes on has to come out exactly as argparse would parse it. Run it after
+changing either parser, it exits non-zero on any difference
+'''
+import io
+import sys
+from contextlib import redirect_stderr
+
+from interface import _fast_parse, setup_parser
+
+
+# Command lines to try, both everyday ones and ones the fast path has to hand on:
+CORPUS = [
+    ['-P', 'in'],
+    ['-P', 'out'],
+    ['-P', 'double'],
+    ['-P', 'in', '-u'],
+    ['-P', 'in', '-d', 'Lunch'],
+    ['-P', 'double', '-u', '-d', 'Lunch'],
+    ['-P', 'in', '-d', ''],
+    ['-P', 'in', '-d', 'First Break', '-n', '3'],
+    ['-P', 'out', '-n', '12', '-f', 'other.db'],
+    ['-P', 'in', '-P', 'out'],
+    ['-P', 'in', '-d', 'a', '-d', 'b'],
+    ['-P', 'in', '-W'],
+    ['-G'],
+    ['-G', '-n', '2'],
+    ['-G', '-f', 'other.db'],
+    ['-A'],
+    ['-A', '-A'],
+    ['-W'],
+    ['-W', '-n', '7', '-u'],
+    ['-W', '-G', '-A'],
+    # Everything below has to be left to argparse:
+    ['-P'],
+    ['-P', 'sideways'],
+    ['-P', '-u'],
+    ['-P', 'in', '-d'],
+    ['-P', 'in', '-d', '-u'],
+    ['-P', 'in', '-o', 'kai'],
+    ['-P', 'in', '-a', 'y'],
+    ['-P', 'in', '--unpaid'],
+    ['-P', 'in', '-dLunch'],
+    ['-Pin'],
+    ['-P=in'],
+    ['-G', 'extra'],
+    ['-G', '-h'],
+    ['-G', '-L'],
+    ['-G', '--'],
+    ['-u', '-P', 'in'],
+    ['--punch', 'in'],
+    ['-n', '3', '-G'],
+    [],
+]
+
+
+def argparse_result(arguments):
+    '''Parses a command line with the full argparse parser, None if argparse rejects it'''
+    try:
+        with redirect_stderr(io.StringIO()):
+            return vars(setup_parser().parse_args(arguments))
+    except SystemExit:
+        return None
+
+
+def main():
+    '''Runs the whole corpus through both parsers, reporting every difference'''
+    mismatches = 0
+    fast_path = 0
+    for arguments in CORPUS:
+        fast = _fast_parse(['timecard'] + arguments)
+        if fast is None: # Left to argparse, so there is nothing to compare
+            continue
+        fast_path += 1
+        expected = argparse_result(arguments)
+        if vars(fast) != expected:
+            mismatches += 1
+            print(f'{" ".join(arguments)}:\n  fast path: {vars(fast)}\n  argparse:  {expected}')
+    print(f'{len(CORPUS)} command lines, {fast_path} took the fast path, '
+          f'{mismatches} differed from argparse')
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
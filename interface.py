@@ -3,32 +3,119 @@ Command line interface library to the Timecard library
 '''
 import sys
 from os import getenv
-from textwrap import dedent
-from datetime import datetime, timezone
-from getpass import getuser
-from argparse import ArgumentParser
 
 
-# This module ties its own parser and formats to itself for simplicity:
-self = sys.modules[__name__]
-
-# The CLI argument parser:
-self.parser = None
-
 # Various formats:
-self.datetimeformat = '%B %d %Y, %I:%M:%S %p %Z'
-#self.datetimeformat_short = '%m-%d-%y %I:%M:%S %p'
-self.dateformat = '%B %d, %Y'
-self.dateformat_short = '%m-%d-%y'
-#self.timeformat = '%I:%M:%S %p'
-self.timeformat_short = '%I:%M %p'
-
-self.pagewidth = 79
+DATETIMEFORMAT = '%B %d %Y, %I:%M:%S %p %Z'
+#DATETIMEFORMAT_SHORT = '%m-%d-%y %I:%M:%S %p'
+DATEFORMAT = '%B %d, %Y'
+DATEFORMAT_SHORT = '%m-%d-%y'
+#TIMEFORMAT = '%I:%M:%S %p'
+TIMEFORMAT_SHORT = '%I:%M %p'
+
+PAGEWIDTH = 79
+
+# Single timecard and punch displays are 45 columns wide, their usual titles are centered once:
+SINGLE_WIDTH = 45
+TIMECARD_TITLE = 'TIMECARD'.center(SINGLE_WIDTH)
+PUNCH_TITLE = 'PUNCH'.center(SINGLE_WIDTH)
+
+# Table rules and headings never change, so they are laid out once here:
+TIMECARD_TABLE_HEAD = [
+    '┌──────┬───┬───────────┬─────────────────────┬──────────┬──────────┐',
+    '│ ID # │ A │   Owner   │     Description     │ Created  │ Reported │',
+    '│──────┼───┼───────────┼─────────────────────┼──────────┼──────────│' ]
+TIMECARD_TABLE_CLOSE = \
+    '└──────┴───┴───────────┴─────────────────────┴──────────┴──────────┘'
+# Columns: ID, active, owner, description, created, reported
+TIMECARD_ROW_FORMAT = '│ {:^4} │ {:^1} │ {:^9} │ {:^19} │ {:^8} │ {:^8} │'
+
+TIME_WORKED_TABLE_HEAD = [ line.center(PAGEWIDTH) for line in [
+    '[ Time Worked ]',
+    '┌────────────────────┬────────────────────┐',
+    '│     Date Worked    │        Hours       │',
+    '│────────────────────┼────────────────────│' ] ]
+TIME_WORKED_TABLE_HR = '│────────────────────┼────────────────────│'.center(PAGEWIDTH)
+# Rows are as wide as the rule, so they share its centering padding:
+TIME_WORKED_ROW_PREFIX, TIME_WORKED_ROW_SUFFIX = \
+    TIME_WORKED_TABLE_HR.split(TIME_WORKED_TABLE_HR.strip())
+# Columns: date worked, hours
+TIME_WORKED_ROW_FORMAT = \
+    TIME_WORKED_ROW_PREFIX + '│ {:^18} │ {:^18} │' + TIME_WORKED_ROW_SUFFIX
+TIME_WORKED_TOTAL_FORMAT = \
+    TIME_WORKED_ROW_PREFIX + '│    Total Hours:    │ {:^18} │' + TIME_WORKED_ROW_SUFFIX
+TIME_WORKED_TABLE_CLOSE = \
+    '└────────────────────┴────────────────────┘'.center(PAGEWIDTH)
+NO_TIME_WORKED = '[─── No Completed Time Worked ───]\n'.center(PAGEWIDTH)
+
+# The punch table is joined up and written in one go, so its pieces carry their own newlines:
+PUNCH_TABLE_HEAD = [ line.center(PAGEWIDTH) + '\n' for line in [
+    '[ Punch Record ]',
+    '┌──────────┬──────────┬──────────┬───────────┬─────────────────────┬──────┐',
+    '│   Date   │ Time In  │ Time Out │ Duration  │     Description     │ Paid │',
+    '│──────────┼──────────┼──────────┼───────────┼─────────────────────┼──────│' ] ]
+PUNCH_TABLE_HR = \
+    '│──────────┼──────────┼──────────┼───────────┼─────────────────────┼──────│'.center(
+    PAGEWIDTH) + '\n'
+# Every punch row is as wide as the rule, so the centering padding is the same for all:
+PUNCH_ROW_PREFIX, PUNCH_ROW_SUFFIX = PUNCH_TABLE_HR.split(PUNCH_TABLE_HR.strip())
+PUNCH_ROW_FORMAT = PUNCH_ROW_PREFIX + \
+    '│ {date:^8} │ {time_in:^8} │ {time_out:^8} │ {duration:^9} │ {descr:^19} │ {paid:>4} │' + \
+    PUNCH_ROW_SUFFIX
+PUNCH_TABLE_CLOSE = \
+    '└──────────┴──────────┴──────────┴───────────┴─────────────────────┴──────┘'.center(
+    PAGEWIDTH) + '\n'
+NO_PUNCHES = '[── No Punches Recorded ──]\n'.center(PAGEWIDTH)
+
+END_OF_REPORT = '<───── End of Report ─────>\n'.center(PAGEWIDTH)
+
+# Timecard report header, laid out once for the page width. Dimensions:
+# lhm 2 + lh label 15 + lh field 18 + rh label 13 + rh field 20 + rhm 2 = min_width (68)
+# Only applicable to report header, individual tables may have longer min_widths.
+# Minimum header label and whitespace dimensions:
+# >2 26                                    2 <
+# >             Horizontal Rule              <
+# >2 13                 3  10              2 <
+# >2 13                 3  10              2 <
+# >2 13                 [--- Not Used ---] 2 <
+# >2 26                                    2 <
+# >             Horizontal Rule              <
+REPORT_HEADER_FORMAT = '''
+{title:^{page_width}}
+{rule:^{page_width}}
+  Timecard ID: {{id:<{lhf_width}}}   Created : {{created:<{rhf_width}}}
+  Owner      : {{owner:<{lhf_width}}}   Reported: {{reported:<{rhf_width}}}
+  Status     : {{status:<{lhf_width}}}
+  Description: {{descr:<{dsf_width}}}
+{rule:^{page_width}}
+'''.format(
+    title='TIMECARD REPORT',
+    rule='─' * (PAGEWIDTH - 2),
+    page_width=PAGEWIDTH,
+    # Left and right hand fields share what is left over past the minimum width:
+    lhf_width=18 + (PAGEWIDTH - 68) // 2,
+    rhf_width=20 + (PAGEWIDTH - 68) // 2,
+    dsf_width=PAGEWIDTH - 15)
 
 
 def main(timecard):
     '''Main method, invoked by the timecard library'''
-    args = setup_parser().parse_args()
+    # Opt-in: let an already running timecard daemon do the work if there is one
+    if getenv('TIMECARD_DAEMON') == '1':
+        from timecardd import forward
+        status = forward(sys.argv)
+        if status is not None:
+            sys.exit(status)
+    parser = None
+    args = _fast_parse(sys.argv)
+    if args is None:
+        parser = setup_parser(_sniff_groups(sys.argv))
+        args = parser.parse_args()
+        # Nothing to do without an action, so don't bother opening the database. The usage
+        # shown lists every option, not just those of the groups that were parsed:
+        if not any(getattr(args, action) for action in ACTIONS):
+            setup_parser().print_usage()
+            return
     if args.filename:
         filename = args.filename
     elif getenv('TIMECARD_FILENAME'):
@@ -37,176 +124,39 @@ def main(timecard):
         filename = 'timecard.db'
     timecard.open_timecard(filename)
     timecard.init_tables()
-    dispatch_action(timecard, args)
+    dispatch_action(timecard, args, parser)
     timecard.close_timecard()
 
 
-def dispatch_action(timecard, args):
-    '''CLI action choice dispather, runs one action chosen by the user
-    Note: only one action runs at a time! Additional actions are discarded'''
-    if args.display_timecard:
-        perform_display_timecard(timecard, args)
-    elif args.new_timecard:
-        perform_new_timecard(timecard, args)
-    elif args.finalize_timecard:
-        perform_finalize_timecard(timecard, args)
-    elif args.mark_reported:
-        perform_mark_reported(timecard, args)
-    elif args.punch:
-        perform_punch(timecard, args)
-    elif args.time_worked:
-        perform_get_time_worked(timecard)
-    elif args.last_punch:
-        perform_get_last_punch(timecard, args)
-    elif args.last_active:
-        perform_get_last_active_punch(timecard, args)
-    elif args.list:
-        perform_list(timecard, args)
-    elif args.report:
-        perform_report(timecard, args)
-    else:
-        self.parser.print_usage()
-        self.parser.exit()
-
-
-def perform_display_timecard(timecard, args):
-    '''Performs the display timecard action'''
-    if not args.timecard_number:
-        title = 'CURRENT TIMECARD'
-    else:
-        title = None
-    timecard_id = select_timecard(timecard, args)
-    display_single_timecard(timecard.get_timecard(timecard_id), title)
-
-
-def perform_new_timecard(timecard, args):
-    '''Performs the new timecard action'''
-    new_timecard_id = timecard.create_timecard(args.owner, args.description)
-    new_timecard = timecard.get_timecard(new_timecard_id)
-    print('New timecard created:')
-    display_single_timecard(new_timecard, 'Timecard ' + str(new_timecard_id))
-
-
-def perform_finalize_timecard(timecard, args):
-    '''Performs the finalize timecard action'''
-    timecard_id = select_timecard(timecard, args)
-    timecard.finalize_timecard(timecard_id)
-    print(f'Timecard {timecard_id} finalized')
-
-
-def perform_mark_reported(timecard, args):
-    '''Performs the mark timecard as reported action'''
-    timecard_id = select_timecard(timecard, args)
-    if timecard.mark_timecard_reported(timecard_id):
-        print(f'Timecard {timecard_id} marked as reported')
-    else:
-        print(f'Timecard {timecard_id} cannot be reported, not finalized?')
-
-
-def perform_punch(timecard, args):
-    '''Performs the timecard punch action, displays the result'''
-    punch_type = args.punch
-    punch_descr = args.description
-    punch_descr_display = ''
-    if punch_descr:
-        punch_descr_display = ' for ' + punch_descr
-    punch_paid = not args.unpaid
-    paid_display = ''
-    if punch_paid:
-        paid_display = ', paid time'
-    else:
-        paid_display = ', unpaid time'
-    timecard_id = select_timecard(timecard, args)
-    check_timecard_record(timecard, timecard_id)
-
-    if punch_type == 'in':
-        if timecard.punch_in(timecard_id, punch_paid, punch_descr):
-            print(f'Punched in on timecard {timecard_id}{punch_descr_display}{paid_display}')
-        else:
-            print(f'Cannot punch in on timecard {timecard_id}')
-    elif punch_type == 'out':
-        if timecard.punch_out(timecard_id):
-            print(f'Punched out on timecard {timecard_id}')
-        else:
-            print(f'Cannot punch out on timecard {timecard_id}')
-    elif punch_type == 'double':
-        timecard.punch_out(timecard_id)
-        timecard.punch_in(timecard_id, punch_paid, punch_descr)
-        print(f'Double punched on timecard {timecard_id}{punch_descr_display}{paid_display}')
-    else:
-        print(f'Unknown punch type: {punch_type}')
-
-
-def perform_get_time_worked(timecard):
-    '''Perform the get time worked function, prints total time worked'''
-    timecard_id = get_timecard_for_current_user(timecard)
-    duration = format_duration(timecard.get_time_worked_today(timecard_id))
-    duration = duration.replace('hr', 'hour').replace('min','minute').replace(',', ' and')
-    print('You have worked for ' + duration + '.')
+# Maps each action argument to the module and function that carries it out, in order of
+# precedence. Handlers are only imported once their action has been chosen:
+ACTIONS = {
+    'display_timecard': ('actions', 'perform_display_timecard'),
+    'new_timecard': ('actions', 'perform_new_timecard'),
+    'finalize_timecard': ('actions', 'perform_finalize_timecard'),
+    'mark_reported': ('actions', 'perform_mark_reported'),
+    'punch': ('actions', 'perform_punch'),
+    'time_worked': ('actions', 'perform_get_time_worked'),
+    'last_punch': ('actions', 'perform_get_last_punch'),
+    'last_active': ('actions', 'perform_get_last_active_punch'),
+    'list': ('actions', 'perform_list'),
+    'report': ('actions', 'perform_report'),
+}
 
 
-def perform_get_last_active_punch(timecard, args):
-    '''Performs the get last active punch action, prints to stdout'''
-    timecard_id = select_timecard(timecard, args)
-    check_timecard_record(timecard, timecard_id)
-    punch = timecard.get_punch(timecard.get_active_punch_id(timecard_id))
-    if punch:
-        display_single_punch(punch, 'ACTIVE PUNCH')
-    else:
-        print('No active punch')
-
-
-def perform_get_last_punch(timecard, args):
-    '''Performs the get last punch action (active or not), prints to stdout'''
-    timecard_id = select_timecard(timecard, args)
-    check_timecard_record(timecard, timecard_id)
-    punch = timecard.get_last_punch_by_timecard(timecard_id)
-    if punch:
-        display_single_punch(punch, 'LAST PUNCH')
-    else:
-        print('No punch to show')
-
-
-def perform_list(timecard, args):
-    '''Performs the list timecards function'''
-    # Timecard Retrieval Methods:
-    # - get_timecard
-    # - get_all_timecards
-    # - get_all_timecards_by_owner
-    # - get_active_timecards (true & false)
-    # - get_active_timecards_by_owner (true & false)
-
-    # Filtration:
-    active = interpret_conditional_boolean(args.active)
-    owner = args.owner
-    if owner is not None and active is None:
-        records = timecard.get_all_timecards_by_owner(owner)
-    elif owner is None and active is not None:
-        records = timecard.get_active_timecards(active)
-    elif owner is not None and active is not None:
-        records = timecard.get_active_timecards_by_owner(owner, active)
-    else:
-        records = timecard.get_all_timecards()
-    display_timecard_records(records)
-
-
-def perform_report(timecard, args):
-    '''Performs the print report function'''
-    report_type = args.report
-    timecard_id = select_timecard(timecard, args)
-    timecard_record = timecard.get_timecard(timecard_id)
-
-    if report_type == 'timeworked':
-        display_timecard_report_header(timecard_record)
-        display_time_worked_report(timecard.get_paid_time_summary(timecard_id))
-    elif report_type == 'punches':
-        display_timecard_report_header(timecard_record)
-        display_punch_report(timecard.get_punches_by_timecard(timecard_id))
-    else:
-        display_timecard_report_header(timecard_record)
-        display_time_worked_report(timecard.get_paid_time_summary(timecard_id))
-        display_punch_report(timecard.get_punches_by_timecard(timecard_id))
-    print('<───── End of Report ─────>\n'.center(self.pagewidth))
+def dispatch_action(timecard, args, parser=None):
+    '''CLI action choice dispather, runs one action chosen by the user
+    Note: only one action runs at a time! Additional actions are discarded'''
+    for action, (module_name, function_name) in ACTIONS.items():
+        if getattr(args, action):
+            from importlib import import_module
+            handler = getattr(import_module(module_name), function_name)
+            handler(timecard, args)
+            return
+    if parser is None:
+        parser = setup_parser()
+    parser.print_usage()
+    parser.exit()
 
 
                         ################################
@@ -216,9 +166,14 @@ def perform_report(timecard, args):
 
 def display_single_timecard(record, title=None):
     '''Displays a single timecard record in a tabular format'''
-    date = record['created'].astimezone().strftime(self.datetimeformat)
+    # Here and in the display helpers below, times are shown with astimezone() and no
+    # argument on purpose: each one then gets the UTC offset in effect on its own date (a
+    # January punch stays in standard time when a report is run in July), and the daemon's
+    # per command TZ is always picked up. A local timezone cached up front would get both
+    # of those wrong.
+    date = record['created'].astimezone().strftime(DATETIMEFORMAT)
     if record['reported']:
-        reported = record['reported'].astimezone().strftime(self.datetimeformat)
+        reported = record['reported'].astimezone().strftime(DATETIMEFORMAT)
     else:
         reported = 'Not Yet Reported'
     if record['active']:
@@ -226,15 +181,18 @@ def display_single_timecard(record, title=None):
     else:
         active = 'No'
     if title is None:
-        title = 'TIMECARD'
-    print( title.center(45))
-    print( '────────────┬────────────────────────────────')
-    print(f'Timecard ID │ {record["id"]}')
-    print(f'Description │ {record["descr"]}')
-    print(f'Owner       │ {record["owner"]}')
-    print(f'Active      │ {active}')
-    print(f'Created     │ {date}')
-    print(f'Reported    │ {reported}')
+        title = TIMECARD_TITLE
+    else:
+        title = title.center(SINGLE_WIDTH)
+    sys.stdout.write(
+        f'{title}\n'
+         '────────────┬────────────────────────────────\n'
+        f'Timecard ID │ {record["id"]}\n'
+        f'Description │ {record["descr"]}\n'
+        f'Owner       │ {record["owner"]}\n'
+        f'Active      │ {active}\n'
+        f'Created     │ {date}\n'
+        f'Reported    │ {reported}\n')
 
 
 def display_single_punch(punch, title=None):
@@ -244,22 +202,30 @@ def display_single_punch(punch, title=None):
     pay_display = 'No'
     if punch['paid']:
         pay_display = 'Yes'
-    time_in_display = punch['time_in'].astimezone().strftime(self.datetimeformat)
+    time_in = punch['time_in']
+    time_out = punch['time_out']
+    time_in_display = time_in.astimezone().strftime(DATETIMEFORMAT)
     if title is None:
-        title = 'PUNCH'
-
-    print( title.center(45))
-    print( '─────────────┬───────────────────────────────')
-    print(f' Punch ID    │ {punch["id"]}')
-    print(f' Description │ {punch["descr"]}')
-    print(f' Paid        │ {pay_display}')
-    print(f' Time In     │ {time_in_display}')
-    if punch['time_out']:
-        time_out_display = punch['time_out'].astimezone().strftime(self.datetimeformat)
-        print(f' Time Out    │ {time_out_display}')
+        title = PUNCH_TITLE
     else:
-        duration = datetime.now(timezone.utc) - punch['time_in']
-        print(f' Duration    │ {format_duration(duration)}')
+        title = title.center(SINGLE_WIDTH)
+    if time_out:
+        time_out_display = time_out.astimezone().strftime(DATETIMEFORMAT)
+        last_line = f' Time Out    │ {time_out_display}'
+    else:
+        # Punch times are already timezone aware, so take "now" in the same timezone:
+        from datetime import datetime
+        duration = datetime.now(time_in.tzinfo) - time_in
+        last_line = f' Duration    │ {format_duration(duration)}'
+
+    sys.stdout.write(
+        f'{title}\n'
+         '─────────────┬───────────────────────────────\n'
+        f' Punch ID    │ {punch["id"]}\n'
+        f' Description │ {punch["descr"]}\n'
+        f' Paid        │ {pay_display}\n'
+        f' Time In     │ {time_in_display}\n'
+        f'{last_line}\n')
 
 
 def display_timecard_records(records):
@@ -267,175 +233,183 @@ def display_timecard_records(records):
     if records is None or len(records) == 0:
         print('No timecards found')
         return
-    print('┌──────┬───┬───────────┬─────────────────────┬──────────┬──────────┐')
-    print('│ ID # │ A │   Owner   │     Description     │ Created  │ Reported │')
-    print('│──────┼───┼───────────┼─────────────────────┼──────────┼──────────│')
-    for rec in records:
-        r_id = rec['id']
-        r_ac = 'Y' if rec['active'] else 'N'
-        r_ow = rec['owner'][:9]
-        r_ds = rec['descr'][:19]
-        r_cr = rec['created'].astimezone().strftime(self.dateformat_short) \
-            if rec['created'] else 'Error'
-        r_rp =  rec['reported'].astimezone().strftime(self.dateformat_short) \
-            if rec['reported'] else 'N/R'
-        print(f'│ {r_id:^4} │ {r_ac:^1} │ {r_ow:^9} │ {r_ds:^19} │ {r_cr:^8} │ {r_rp:^8} │')
-    print('└──────┴───┴───────────┴─────────────────────┴──────────┴──────────┘')
+    # Build the whole table up front and write it out at once:
+    lines = list(TIMECARD_TABLE_HEAD)
+    dateformat_short = DATEFORMAT_SHORT
+    # Prepare each column in one go, then stitch the columns together row by row:
+    r_ids = [ rec['id'] for rec in records ]
+    r_acs = [ 'Y' if rec['active'] else 'N' for rec in records ]
+    r_ows = [ rec['owner'][:9] for rec in records ]
+    r_dss = [ rec['descr'][:19] for rec in records ]
+    r_crs = [ rec['created'].astimezone().strftime(dateformat_short)
+              if rec['created'] else 'Error' for rec in records ]
+    r_rps = [ rec['reported'].astimezone().strftime(dateformat_short)
+              if rec['reported'] else 'N/R' for rec in records ]
+    row_format = TIMECARD_ROW_FORMAT.format
+    lines.extend(row_format(*row) for row in zip(r_ids, r_acs, r_ows, r_dss, r_crs, r_rps))
+    lines.append(TIMECARD_TABLE_CLOSE)
+    sys.stdout.write('\n'.join(lines) + '\n')
 
 
 def display_timecard_report_header(record):
     '''Prints a timecard report header according to the record provided'''
+    # The record is left untouched, it may still be needed by the caller:
     if not record['reported']:
-        record['reported'] = 'Not yet reported'
+        reported = 'Not yet reported'
     else:
-        record['reported'] = record['reported'].astimezone().strftime(self.dateformat)
+        reported = record['reported'].astimezone().strftime(DATEFORMAT)
     if not record['created']:
-        record['created'] = 'Error'
+        created = 'Error'
     else:
-        record['created'] = record['created'].astimezone().strftime(self.dateformat)
+        created = record['created'].astimezone().strftime(DATEFORMAT)
     if record['active']:
         status = 'Active'
     elif not record['active'] and not record['reported']:
         status = 'Finalised'
     else:
         status = 'Reported'
-    # lhm 2 + lh label 15 + lh field 18 + rh label 13 + rh field 20 + rhm 2 = min_width
-    # Only applicable to report header, individual tables may have longer min_widths
-    min_width = 68
-    page_width = self.pagewidth
-    half_leftover = (self.pagewidth - min_width) // 2
-    # Left hand and right hand field width determination:
-    lhf_width = 18 + half_leftover
-    rhf_width = 20 + half_leftover
-    # Description field width:
-    dsf_width = self.pagewidth - 15
-    # Horizontal rule width
-    hr_width = self.pagewidth - 2
-    # Minimum header label and whitespace dimensions:
-    # >2 26                                    2 <
-    # >             Horizontal Rule              <
-    # >2 13                 3  10              2 <
-    # >2 13                 3  10              2 <
-    # >2 13                 [--- Not Used ---] 2 <
-    # >2 26                                    2 <
-    # >             Horizontal Rule              <
-    header_format='''
-    {:^{page_width}}
-    {:^{page_width}}
-      Timecard ID: {:<{lhf_width}}   Created : {:<{rhf_width}}
-      Owner      : {:<{lhf_width}}   Reported: {:<{rhf_width}}
-      Status     : {:<{lhf_width}}
-      Description: {:<{dsf_width}}
-    {:^{page_width}}
-    '''
-    report_title = 'TIMECARD REPORT'
-    horizontal_rule = '─' * hr_width
-    header = dedent(header_format).format(
-        report_title,
-        horizontal_rule,
-        record['id'],
-        record['created'],
-        record['owner'],
-        record['reported'],
-        status,
-        record['descr'],
-        horizontal_rule,
-        page_width=page_width,
-        lhf_width=lhf_width,
-        rhf_width=rhf_width,
-        dsf_width=dsf_width,
-        hr_width=hr_width)
-    print(header)
+    print(REPORT_HEADER_FORMAT.format(id=record['id'], created=created, owner=record['owner'],
+        reported=reported, status=status, descr=record['descr']))
 
 
 def display_time_worked_report(work_records):
     '''Prints out a time worked report for a given set of work records'''
     if work_records is None:
-        print('[─── No Completed Time Worked ───]\n'.center(self.pagewidth))
+        print(NO_TIME_WORKED)
         return
-    print('[ Time Worked ]'.center(self.pagewidth))
-    print( '┌────────────────────┬────────────────────┐'.center(self.pagewidth))
-    print( '│     Date Worked    │        Hours       │'.center(self.pagewidth))
-    print( '│────────────────────┼────────────────────│'.center(self.pagewidth))
+    # Build the whole table up front and write it out at once:
+    lines = list(TIME_WORKED_TABLE_HEAD)
     total = None
+    dateformat = DATEFORMAT
+    row_format = TIME_WORKED_ROW_FORMAT.format
     for entry in work_records:
         total = total + entry['hours'] if total is not None else entry['hours']
-        date = entry['date'].astimezone().strftime(self.dateformat)
+        date = entry['date'].astimezone().strftime(dateformat)
         hours = format_duration(entry['hours'])
-        print(f'│ {date:^18} │ {hours:^18} │'.center(self.pagewidth))
+        lines.append(row_format(date, hours))
     total = format_duration(total)
-    print( '│────────────────────┼────────────────────│'.center(self.pagewidth))
-    print(f'│    Total Hours:    │ {total:^18} │'.center(self.pagewidth))
-    print( '└────────────────────┴────────────────────┘'.center(self.pagewidth))
-    print('')
+    lines.append(TIME_WORKED_TABLE_HR)
+    lines.append(TIME_WORKED_TOTAL_FORMAT.format(total))
+    lines.append(TIME_WORKED_TABLE_CLOSE)
+    lines.append('')
+    sys.stdout.write('\n'.join(lines) + '\n')
+
+
+def _punch_row(punch, local_time_in, now):
+    '''Formats every field of a punch report row but the date (now only needs to be given
+    for punches which are still active)'''
+    time_out = punch['time_out']
+    # Time out may still be active if a preliminary report is generated. Displayed in local
+    # time, the duration is still worked out from the UTC values:
+    return {
+        'time_in': local_time_in.strftime(TIMEFORMAT_SHORT),
+        'time_out': time_out.astimezone().strftime(TIMEFORMAT_SHORT) if time_out else 'N/A',
+        'duration': format_duration_short((time_out or now) - punch['time_in']),
+        # Trim up the description for display in the table:
+        'descr': punch['descr'][:19],
+        'paid': 'Yes' if punch['paid'] else 'No',
+    }
 
 
 def display_punch_report(punch_records):
     '''Prints a report of all timecard punches'''
-    # This is a massive function that could stand for a refactor
     if punch_records is None:
-        print('[── No Punches Recorded ──]\n'.center(self.pagewidth))
+        print(NO_PUNCHES)
         return
-    table_head = [ '[ Punch Record ]',
-                    '┌──────────┬──────────┬──────────┬───────────┬─────────────────────┬──────┐',
-                    '│   Date   │ Time In  │ Time Out │ Duration  │     Description     │ Paid │',
-                    '│──────────┼──────────┼──────────┼───────────┼─────────────────────┼──────│' ]
-    table_hr      = '│──────────┼──────────┼──────────┼───────────┼─────────────────────┼──────│'
-    table_close   = '└──────────┴──────────┴──────────┴───────────┴─────────────────────┴──────┘'
-    seen_date = ''
+    row_format = PUNCH_ROW_FORMAT.format_map
+    table_hr = PUNCH_TABLE_HR
+    seen_day = None
+    now = None # Taken once, the first time an open punch needs it
     first_line = True
-    # Print the table header:
-    for line in table_head:
-        print(line.center(self.pagewidth))
-    # Print the table body:
+    # Start with the table header, the whole table is written out at once at the end:
+    lines = list(PUNCH_TABLE_HEAD)
+    # Build the table body:
+    dateformat_short = DATEFORMAT_SHORT
     for punch in punch_records:
-        # Trim up the fields for display in the table:
-        desc = punch['descr'][:19]
-        paid = 'Yes' if punch['paid'] else 'No'
-        t_in = punch['time_in'].astimezone().strftime(self.timeformat_short)
-        # Time out may still be active if a preliminary report is generated:
-        if punch['time_out']:
-            t_out = punch['time_out'].astimezone().strftime(self.timeformat_short)
-            dur_end = punch['time_out']
-        else:
-            t_out = 'N/A'
-            dur_end = datetime.now(timezone.utc)
-        date = punch['time_in'].astimezone().strftime(self.dateformat_short)
-        # Calculate the duration for this table row:
-        dur = format_duration_short((dur_end - punch['time_in']))
-
-        # Print out a horizonal table rule followed immediately by the date
-        if date != seen_date:
-            seen_date = date
+        if now is None and not punch['time_out']:
+            from datetime import datetime, timezone
+            now = datetime.now(timezone.utc)
+        # Only convert to local time once, both the date and time in come from it:
+        local_time_in = punch['time_in'].astimezone()
+        row = _punch_row(punch, local_time_in, now)
+
+        # Print out a horizonal table rule followed immediately by the date, punches come
+        # grouped by day so the date only needs formatting when the (local) day changes
+        day = local_time_in.date()
+        if day != seen_day:
+            seen_day = day
+            row['date'] = local_time_in.strftime(dateformat_short)
             if not first_line: # Prevent a double-printed HR at the top of the table
-                print(table_hr.center(self.pagewidth))
+                lines.append(table_hr)
             else:
                 first_line = False
         else: # then clear it, so that we only get one date printed per day
-            date = ''
-        # Print a formatted table row:
-        print(
-            f'│ {date:^8} │ {t_in:^8} │ {t_out:^8} │ {dur:^9} │ {desc:^19} │ {paid:>4} │'.center(
-            self.pagewidth
-            )
-        )
-    print(table_close.center(self.pagewidth))
-    print('')
+            row['date'] = ''
+        # Add a formatted table row:
+        lines.append(row_format(row))
+    lines.append(PUNCH_TABLE_CLOSE)
+    lines.append('\n')
+    # One write, so the text layer encodes the whole report in a single pass (writelines
+    # would encode and write line by line):
+    sys.stdout.write(''.join(lines))
 
 
                                 ################
                                 # PARSER SETUP #
                                 ################
-def setup_parser():
-    '''Configures the options parser'''
+# What every grouped option reads as when it is not given:
+ACTION_DEFAULTS = {
+    'display_timecard': False, 'new_timecard': False, 'finalize_timecard': False,
+    'mark_reported': False, 'punch': None, 'time_worked': False, 'last_punch': False,
+    'last_active': False, 'unpaid': False, 'list': False, 'report': None,
+}
+
+# Flags belonging to each optional argument group, used to decide which
+# groups need to be built for a given command line:
+GROUP_FLAGS = {
+    'timecard': ('-D', '--display-timecard', '-N', '--new-timecard',
+                 '-F', '--finalize-timecard', '-M', '--mark-reported'),
+    'punch': ('-P', '--punch', '-W', '--time-worked', '-G', '--last-punch',
+              '-A', '--last-active', '-u', '--unpaid'),
+    'reporting': ('-L', '--list', '-R', '--report'),
+}
+BASE_FLAGS = ('-h', '--help', '-f', '--filename', '-d', '--description',
+              '-o', '--owner', '-n', '--timecard-number', '-a', '--active')
+# Short options taking a value, anything after one of them in a cluster (e.g. -Pin) is its value:
+SHORT_VALUE_FLAGS = ('-P', '-R', '-f', '-d', '-o', '-n', '-a')
+
+
+def setup_parser(groups=None):
+    '''Configures the options parser, building only the argument groups requested
+    (all of them if groups is None)'''
+    if groups is None:
+        groups = set(GROUP_FLAGS)
+    parser = _build_base_parser()
+    if 'timecard' in groups:
+        _add_timecard_group(parser)
+    if 'punch' in groups:
+        _add_punch_group(parser)
+    if 'reporting' in groups:
+        _add_reporting_group(parser)
+    if groups != set(GROUP_FLAGS):
+        # Errors are reported by a parser with every group, so usage lists every option:
+        parser.error = lambda message: setup_parser().error(message)
+    return parser
+
+
+def _build_base_parser():
+    '''Builds the parser with only the options common to every action'''
+    from argparse import ArgumentParser
     parser = ArgumentParser(
                 description='A simple timecard application to help track the time you\'ve worked.',
                 epilog='Copyright (c) Kai M Wetlesen, All Rights Reserved'
             )
+    # Actions from groups that are not built must still read as unset:
+    parser.set_defaults(**ACTION_DEFAULTS)
     parser.add_argument('-f', '--filename',
         help='Database name where timecard data is stored')
     parser.add_argument('-d', '--description',
-        help=dedent('''
+        help=_dedented_help('''
         Description to add to a time punch (e.g. "Lunch", "First Break", etc.) or timecard, only
         applicable to punch ins, double punches, and creation of new timecards
         ''')
@@ -446,7 +420,11 @@ def setup_parser():
     parser.add_argument('-a', '--active',
         choices=['y','n','yes','no'],
         help='Filters timecards or punches by their being marked active')
+    return parser
+
 
+def _add_timecard_group(parser):
+    '''Adds the timecard management options to the parser'''
     timecard_group = parser.add_argument_group('Timecard Management',
         'Manage new and registered timecards')
     timecard_group.add_argument('-D', '--display-timecard',
@@ -460,6 +438,9 @@ def setup_parser():
         help='Marks a timecard as reported, as in the record is turned into payroll',
         action='store_true')
 
+
+def _add_punch_group(parser):
+    '''Adds the time recording options to the parser'''
     punch_group = parser.add_argument_group('Time Recording', 'Punch in and out on a timecard')
     punch_group.add_argument('-P', '--punch',
         help='Punches in or out on a timecard, or double-punches to punch for break, lunch, etc.',
@@ -471,27 +452,108 @@ def setup_parser():
     punch_group.add_argument('-A', '--last-active', action='store_true',
         help='Show the most recent active punch')
     punch_group.add_argument('-u', '--unpaid', action='store_true', default=False,
-        help=dedent(
+        help=_dedented_help(
         '''
         Indicate whether the new punch is for unpaid time (e.g. a lunch break), only applicable
         to punch ins and double punches, otherwise time is marked as paid
         ''')
         )
 
+
+def _add_reporting_group(parser):
+    '''Adds the reporting options to the parser'''
     reporting_group = parser.add_argument_group('Reporting',
         'Generate reports for individual timecards, find timecards, or mark timecards as reported')
     reporting_group.add_argument('-L', '--list',
         help='List timecards, optionally based on criteria established by -a and -o',
         action='store_true')
     reporting_group.add_argument('-R', '--report',
-        help=dedent(
+        help=_dedented_help(
             '''
             Generate timecard reports, where "timeworked" reports only include time worked,
             "punches" only include times in and out and "full" pulls all information
             '''),
         choices=['timeworked', 'punches', 'full'])
-    self.parser = parser
-    return parser
+
+
+# Help texts already run through dedent, keyed by their original text:
+HELP_CACHE = {}
+
+
+def _dedented_help(text):
+    '''Dedents a multi-line help text, only doing the work the first time it's asked for'''
+    dedented = HELP_CACHE.get(text)
+    if dedented is None:
+        from textwrap import dedent
+        dedented = HELP_CACHE[text] = dedent(text)
+    return dedented
+
+
+# Options understood by _fast_parse, mapped to where they are stored:
+FAST_PATH_SWITCHES = {'-G': 'last_punch', '-A': 'last_active', '-W': 'time_worked',
+                      '-u': 'unpaid'}
+FAST_PATH_VALUES = {'-P': 'punch', '-d': 'description', '-n': 'timecard_number',
+                    '-f': 'filename'}
+FAST_PATH_PUNCHES = ('in', 'out', 'double')
+# Only command lines starting with one of these take the fast path:
+FAST_PATH_ACTIONS = ('-P', '-G', '-A', '-W')
+
+
+def _fast_parse(argv):
+    '''Parses the everyday punch command lines (starting with -P, -G, -A or -W) without argparse
+    Only plain short options are understood, anything else returns None so that argparse
+    can deal with it (and report any errors)'''
+    if len(argv) < 2 or argv[1] not in FAST_PATH_ACTIONS:
+        return None
+    from types import SimpleNamespace
+    args = SimpleNamespace(filename=None, description=None, owner=None, timecard_number=None,
+                           active=None, **ACTION_DEFAULTS)
+    options = iter(argv[1:])
+    for option in options:
+        if option in FAST_PATH_SWITCHES:
+            setattr(args, FAST_PATH_SWITCHES[option], True)
+        elif option in FAST_PATH_VALUES:
+            value = next(options, None)
+            if value is None or value.startswith('-'):
+                return None
+            if option == '-P' and value not in FAST_PATH_PUNCHES:
+                return None
+            setattr(args, FAST_PATH_VALUES[option], value)
+        else:
+            return None
+    return args
+
+
+def _sniff_groups(argv):
+    '''Works out which argument groups the command line refers to
+    Falls back to every group for help or unrecognized flags, so that help and error
+    messages still list every option'''
+    every_group = set(GROUP_FLAGS)
+    groups = set()
+    for arg in argv[1:]:
+        if arg == '-h':
+            return every_group
+        if arg.startswith('--'):
+            # Long options may be abbreviated to any unambiguous prefix:
+            name = arg.split('=', 1)[0]
+            if len(name) > 2 and '--help'.startswith(name):
+                return every_group
+            found = {group for group, flags in GROUP_FLAGS.items()
+                     if any(flag.startswith(name) for flag in flags)}
+            if not found and not any(flag.startswith(name) for flag in BASE_FLAGS):
+                return every_group
+            groups |= found
+        elif arg.startswith('-') and len(arg) > 1:
+            # Short options may be clustered (e.g. -uPin), so check every letter:
+            for letter in arg[1:]:
+                flag = '-' + letter
+                found = {group for group, flags in GROUP_FLAGS.items() if flag in flags}
+                if not found and flag not in BASE_FLAGS:
+                    return every_group
+                groups |= found
+                if flag in SHORT_VALUE_FLAGS: # The rest is its value
+                    break
+    return groups if groups else every_group
 
 
                              #####################
@@ -500,77 +562,70 @@ def setup_parser():
 
 
 def get_timecard_for_current_user(timecard, active=True):
-    '''Retrieves any active timecards active for the current user
+    '''Retrieves the record of any timecard active for the current user
     Important! Will exit if no existing active timecard is found!'''
     # For the instances where username does not correspond to the timecard
     # user (which should be rare if not transferring between machines):
     if getenv('TIMECARD_USER'):
         owner = getenv('TIMECARD_USER')
     else:
+        from getpass import getuser
         owner = getuser()
-    timecard_record = timecard.get_active_timecards_by_owner(owner, active)
-    timecard_id = None
-    if len(timecard_record) == 0:
+    timecard_records = timecard.get_active_timecards_by_owner(owner, active)
+    if len(timecard_records) == 0:
         print('No ' + ('active' if active else 'inactive') + ' timecards found')
-        self.parser.exit()
-    else:
-        timecard_id = timecard_record[0]['id']
-        owner = timecard_record[0]['owner']
-    return timecard_id
+        sys.exit()
+    return timecard_records[0]
 
 
 def select_timecard(timecard, args, active=True):
     '''Implements the timecard selection logic, prioritizing arguments over defaults'''
     timecard_id = args.timecard_number
     if timecard_id is None:
-        timecard_id = get_timecard_for_current_user(timecard, active)
+        timecard_id = get_timecard_for_current_user(timecard, active)['id']
     return timecard_id
 
 
-def check_timecard_record(timecard, timecard_id):
-    '''Logic to check that the timecard ID exists and is active'''
-    timecard_record = timecard.get_timecard(timecard_id)
+def select_timecard_record(timecard, args, active=True):
+    '''Same selection logic as select_timecard, but returns the whole timecard record
+    (None if the timecard number given doesn't exist)'''
+    if args.timecard_number is None:
+        return get_timecard_for_current_user(timecard, active)
+    return timecard.get_timecard(args.timecard_number)
+
+
+def check_timecard_record(timecard_record, timecard_id):
+    '''Logic to check that the selected timecard record exists and is active'''
     if timecard_record is None:
         print(f'No such timecard {timecard_id}')
-        self.parser.exit()
+        sys.exit()
     elif not timecard_record['active']:
-        print(f'Timecard {timecard_id} is not active')
-        self.parser.exit()
+        print(f'Timecard {timecard_record["id"]} is not active')
+        sys.exit()
 
 
-def interpret_conditional_boolean(value):
-    '''Converts a text 'yes' or 'no' into a proper boolean, preserving unsettedness'''
-    if value in ('y', 'yes'):
-        active = True
-    elif value in ('n', 'no'):
-        active = False
-    else:
-        active = None
-    return active
+# Answers accepted by -a and what they stand for:
+CONDITIONAL_BOOLEANS = {'y': True, 'yes': True, 'n': False, 'no': False}
 
 
-def format_duration(duration):
-    '''Formats a duration in HH hrs, MM mins according to English grammar rules'''
-    total_seconds = duration.days * 86400 + duration.seconds
-    duration_hr =  total_seconds // 3600
-    duration_min = (total_seconds  % 3600) // 60
+def interpret_conditional_boolean(value):
+    '''Converts a text 'yes' or 'no' into a proper boolean, preserving unsettedness'''
+    return CONDITIONAL_BOOLEANS.get(value)
 
-    duration_display = ''
-    if duration_hr == 1:
-        duration_display += str(duration_hr) + ' hr, '
-    else:
-        duration_display += str(duration_hr) + ' hrs, '
 
-    if duration_min == 1:
-        duration_display += str(duration_min) + ' min'
-    else:
-        duration_display += str(duration_min) + ' mins'
-    return duration_display
+def format_duration(duration, long=False):
+    '''Formats a duration in HH hrs, MM mins according to English grammar rules
+    (or HH hours and MM minutes when long is set)'''
+    duration_hr, remainder = divmod(int(duration.total_seconds()), 3600)
+    duration_min = remainder // 60
+    if long:
+        return f'{duration_hr} {"hour" if duration_hr == 1 else "hours"} and ' \
+               f'{duration_min} {"minute" if duration_min == 1 else "minutes"}'
+    return f'{duration_hr} {"hr" if duration_hr == 1 else "hrs"}, ' \
+           f'{duration_min} {"min" if duration_min == 1 else "mins"}'
 
 
 def format_duration_short(duration):
     '''Formats a duration in HHh MMm for display in space constrained settings'''
-    total_seconds = duration.days * 86400 + duration.seconds
-    duration_hr =  total_seconds // 3600
-    duration_min = (total_seconds  % 3600) // 60
-    return str(duration_hr) + 'h ' + str(duration_min) + 'm'
+    duration_hr, remainder = divmod(duration.days * 86400 + duration.seconds, 3600)
+    return f'{duration_hr}h {remainder // 60}m'
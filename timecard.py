@@ -2,52 +2,145 @@
 '''
 Timecard: Simple time card management in Python
 '''
+import os
 import sys
 import sqlite3
 import getpass
 import time
+from contextlib import contextmanager
 from datetime import date
 from datetime import datetime
 from datetime import timezone
 from datetime import timedelta
+from datetime import time as time_of_day
+
+
+NOT_CONNECTED = 'Database connection not established'
+
+
+class UninitializedDB:
+    '''Stands in for the database connection until one is opened, so that using the
+    database too early fails loudly without every function having to check first'''
+    # Nothing can be under way yet, writes then go on to fail as they execute:
+    in_transaction = False
+
+    @staticmethod
+    def cursor(*_args):
+        '''Fails, there is no database to query yet'''
+        raise RuntimeError(NOT_CONNECTED)
+
+    @staticmethod
+    def execute(*_args):
+        '''Fails, there is no database to query yet'''
+        raise RuntimeError(NOT_CONNECTED)
+
+    @staticmethod
+    def executemany(*_args):
+        '''Fails, there is no database to query yet'''
+        raise RuntimeError(NOT_CONNECTED)
+
+    @staticmethod
+    def executescript(*_args):
+        '''Fails, there is no database to query yet'''
+        raise RuntimeError(NOT_CONNECTED)
+
+    @staticmethod
+    def commit():
+        '''Fails, there is no database to commit to yet'''
+        raise RuntimeError(NOT_CONNECTED)
+
+    @staticmethod
+    def rollback():
+        '''Fails, there is no database to roll back yet'''
+        raise RuntimeError(NOT_CONNECTED)
+
+    @staticmethod
+    def close():
+        '''Fails, there is no database to close yet'''
+        raise RuntimeError(NOT_CONNECTED)
 
 
 # Configure package-level arguments (not exposed in API):
 self = sys.modules[__name__]
-self.db = None
+self.db = UninitializedDB()
+# Where the open database lives, reopening it is then a no-op:
+self.filename = None
+# Writes are committed as they happen unless held back with begin() until flush():
+self.autocommit = True
+# UPDATE ... RETURNING needs SQLite 3.35 or newer, older builds fall back to a lookup:
+self.has_returning = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Applied to every connection as it is opened. WAL lets readers carry on while a punch is
+# written, and with it synchronous=NORMAL only syncs to disk at checkpoints (still safe
+# against corruption, a power cut may just lose the latest commits). The busy timeout goes
+# first, switching an existing database over to WAL takes an exclusive lock that may have
+# to be waited for:
+CONNECTION_PRAGMAS = '''
+    PRAGMA busy_timeout = 5000;
+    PRAGMA journal_mode = WAL;
+    PRAGMA synchronous = NORMAL;
+    PRAGMA temp_store = MEMORY;
+    PRAGMA cache_size = -64000;
+'''
+
+
+def commit():
+    '''Utility: Commits the current write unless writes are being held until flush()'''
+    if self.autocommit:
+        self.db.commit()
 
 
-def require_database(func):
-    '''Decorator: Ensures database connection is established prior to calling method'''
-    def test_for_db(*args, **kwargs):
-        if not self.db:
-            raise Exception('Database connection not established')
-        return func(*args, **kwargs)
-    return test_for_db
+def fetch_scalar(query, params=()):
+    '''Utility: Runs a query for a single value, returning None if there's no result'''
+    # A plain tuple is all it takes to hold one value, so skip building a Row for it:
+    cursor = self.db.cursor()
+    cursor.row_factory = None
+    result = cursor.execute(query, params).fetchone()
+    if result is None:
+        return None
+    return result[0]
 
 
 def row_to_dict(row):
     '''Utility: Converts a database row into a dictionary'''
     if not row:
         return None
-    return { k: row[k] for k in row.keys() }
+    return dict(zip(row.keys(), row))
 
 
 def rows_to_dicts(rows):
     '''Utility: Converts a set of database rows to a list of dictionaries'''
     if not rows:
         return None
-    return [ row_to_dict(row) for row in rows ]
+    # Every row shares the same columns, so only look the names up on the first one:
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return []
+    keys = tuple(first.keys())
+    dicts = [ dict(zip(keys, first)) ]
+    dicts.extend(dict(zip(keys, row)) for row in rows)
+    return dicts
+
+
+# How to serialize the types JSON dumps can't handle on its own:
+SERIALIZERS = {
+    date: date.isoformat,
+    datetime: datetime.isoformat,
+    time_of_day: time_of_day.isoformat,
+}
 
 
 def serialize(obj):
     '''Utility: overcomes limitations with JSON dumps by assigning a time format'''
-    serialized = None
-    if isinstance(obj, (datetime.date, datetime.datetime, datetime.time)):
-        serialized = obj.isoformat()
-    else: # we have a decent enough method to serialize already:
-        serialized = obj
-    return serialized
+    serializer = SERIALIZERS.get(type(obj))
+    if serializer is None: # we have a decent enough method to serialize already:
+        return obj
+    return serializer(obj)
+
+
+# ISO offsets built for timestamp conversions so far, keyed by their hour and minute offsets:
+OFFSET_SUFFIXES = { (0, 0): '+00:00' }
 
 
 def sqlite_ts_to_datetime(timestamp, offset_hrs=0, offset_mins=0):
@@ -55,77 +148,79 @@ def sqlite_ts_to_datetime(timestamp, offset_hrs=0, offset_mins=0):
     # Note: You should be using UTC in SQLite! You will make your life
     #       very hard if you choose to use anything else, thanks to
     #       Daylight Savings Time.
-    offset = offset_hrs * 100 + offset_mins
-    return datetime.strptime(timestamp + f' {offset:+05}', '%Y-%m-%d %H:%M:%S %z')
-
+    suffix = OFFSET_SUFFIXES.get((offset_hrs, offset_mins))
+    if suffix is None:
+        offset = timedelta(hours=offset_hrs, minutes=offset_mins)
+        sign = '-' if offset < timedelta(0) else '+'
+        hours, minutes = divmod(abs(offset) // timedelta(minutes=1), 60)
+        suffix = OFFSET_SUFFIXES[offset_hrs, offset_mins] = \
+            f'{sign}{hours:02}:{minutes:02}'
+    if isinstance(timestamp, bytes): # As handed over by the timestamp converter
+        timestamp = timestamp.decode()
+    # SQLite3 timestamps are ISO 8601 (YYYY-MM-DD HH:MM:SS), so with the offset tacked on
+    # datetime's own parser, written in C, does the whole conversion in one call:
+    return datetime.fromisoformat(timestamp + suffix)
+
+
+def datetime_to_sqlite_ts(value):
+    '''Utility: Converts datetimes to SQLite3 timestamps in UTC (naive ones are taken as
+    local time). ISO 8601 strings are parsed first, naive ones being taken as UTC as
+    SQLite3 timestamps are, anything else raises a TypeError'''
+    if isinstance(value, str):
+        # Stored as is, strings with a T or an offset couldn't be read back later on:
+        value = datetime.fromisoformat(value)
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+    elif not isinstance(value, datetime):
+        raise TypeError(f'Expected a datetime or timestamp string, not {type(value).__name__}')
+    return value.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+# Columns declared as timestamps come out of the database as timezone aware datetimes
+# (for connections opened with detect_types, as open_timecard does). Note converters are
+# registered for the whole process, this replaces sqlite3's own naive timestamp converter:
+sqlite3.register_converter('timestamp', sqlite_ts_to_datetime)
 
-def convert_record_to_datetime(record):
-    '''Utility: Converts punches from SQLite3 timestamps to timezone aware datetimes'''
-    convertible_fields = ['created', 'reported', 'time_in', 'time_out']
-    for field in convertible_fields:
-        if field in record and record[field] is not None:
-            record[field] = sqlite_ts_to_datetime(record[field])
-    return record
 
-
-@require_database
 def get_active_punch_id(timecard_id):
     '''Retrieves the most recently active punch for a specific timecard'''
     select_active_punch_id = \
     'select id from punches where timecard = ? and active = true order by time_in desc limit 1'
-    result = self.db.execute(select_active_punch_id, [timecard_id]).fetchone()
-    if result:
-        result = result['id']
-    else:
-        result = None
-    return result
+    return fetch_scalar(select_active_punch_id, [timecard_id])
 
 
-@require_database
 def get_punch(punch_id):
     '''Retrieves a singular punch by the primary key'''
     select_punch = 'select * from punches where id = ?'
     punch = self.db.execute(select_punch, [punch_id]).fetchone()
     punch = row_to_dict(punch)
-    if punch is not None:
-        punch = convert_record_to_datetime(punch)
     return punch
 
 
-@require_database
 def get_punches_by_timecard(timecard_id):
     '''Retrieves a set of punches by timecard ID'''
-    select_punches = 'select * from punches where timecard = ?'
+    select_punches = 'select * from punches where timecard = ? order by id'
     punches = self.db.execute(select_punches, [timecard_id]).fetchall()
     punches = rows_to_dicts(punches)
-    if punches is not None:
-        punches = list(map(convert_record_to_datetime, punches))
     return punches
 
 
-@require_database
 def get_paid_punches_by_timecard(timecard_id, paid = True):
     '''Retrieves all paid punches (unpaid if paid = False) by timecard ID'''
-    select_punches = 'select * from punches where timecard = ? and paid = ?'
+    select_punches = 'select * from punches where timecard = ? and paid = ? order by id'
     punches = self.db.execute(select_punches, [timecard_id, paid]).fetchall()
     punches = rows_to_dicts(punches)
-    if punches is not None:
-        punches = list(map(convert_record_to_datetime, punches))
     return punches
 
 
-@require_database
 def get_last_punch_by_timecard(timecard_id):
     '''Retrieves a set of punches by timecard ID'''
     select_punches = 'select * from punches where timecard = ? order by time_in desc limit 1'
     punch = self.db.execute(select_punches, [timecard_id]).fetchone()
     punch = row_to_dict(punch)
-    if punch is not None:
-        punch = convert_record_to_datetime(punch)
     return punch
 
 
-@require_database
 def get_todays_punches(timecard_id):
     '''Retrieves any timecard punches from today'''
     # Figure out the beginning of the day in UTC
@@ -134,37 +229,30 @@ def get_todays_punches(timecard_id):
     today = today.replace(tzinfo=timezone.utc)
     tomorrow = today + timedelta(days = 1)
     select_todays_punches = \
-    'select * from punches where timecard = ? and time_in >= ? and time_in < ?'
+    'select * from punches where timecard = ? and time_in >= ? and time_in < ? order by id'
     punches = self.db.execute(select_todays_punches, [timecard_id, today, tomorrow])
     punches = rows_to_dicts(punches)
-    if punches is not None:
-        punches = list(map(convert_record_to_datetime, punches))
     return punches
 
 
-@require_database
 def get_completed_punches_by_timecard(timecard_id):
     '''Retrieves all completed punches by timecard ID'''
     select_punches = \
-    'select * from punches where time_out is not null and active = false and timecard = ?'
+    'select * from punches where time_out is not null and active = false and timecard = ? ' \
+    'order by id'
     punches = self.db.execute(select_punches, [timecard_id]).fetchall()
     punches = rows_to_dicts(punches)
-    if punches is not None:
-        punches = list(map(convert_record_to_datetime, punches))
     return punches
 
 
 # TODO: Add card_key field such that multiple timecards may be managed by the same owner.
 # Use case: a lawyer at a law firm maintains multiple time records for multiple clients.
-@require_database
 def create_timecard(owner = None, descr = None):
     '''Creates a new timecard with optional owner and description'''
     deactivate_existing_timecards = \
     'update timecards set active = false where owner = ?'
     create_new_timecard = \
     'insert into timecards (owner, descr) values (?, ?)'
-    retrieve_created_timecard = \
-    'select id from timecards where owner = ? and descr = ? and active = true order by created desc'
     # Fill in some defaults:
     if not owner:
         owner = getpass.getuser()
@@ -172,96 +260,73 @@ def create_timecard(owner = None, descr = None):
         descr = 'Week ' + str(date.today().isocalendar().week)
     #try:
     self.db.execute(deactivate_existing_timecards, [owner])
-    self.db.execute(create_new_timecard, [owner, descr])
-    self.db.commit()
+    # The insert hands back the new ID itself, no need to look the timecard up again:
+    result = self.db.execute(create_new_timecard, [owner, descr]).lastrowid
+    commit()
     #except sqlite3.IntegrityError as e:
     #    if excp.args[0].startswith('UNIQUE constraint failed')
-    result = self.db.execute(retrieve_created_timecard, [owner, descr]).fetchone()
-    if result:
-        result = result['id']
-    else:
-        result = None
     return result
 
 
-@require_database
 def finalize_timecard(timecard_id):
     '''Finalizes an existing timecard, locking in all punches'''
     deactivate_timecard = \
     'update timecards set active = false where id = ?'
     self.db.execute(deactivate_timecard, [timecard_id])
-    self.db.commit()
+    commit()
 
 
-@require_database
 def mark_timecard_reported(timecard_id):
-    '''Marks an existing timecard as reported'''
-    deactivate_timecard = \
-    'update timecards set reported = current_timestamp where id = ?'
-    timecard = get_timecard(timecard_id)
-    result = True
-    if not timecard['active']:
-        self.db.execute(deactivate_timecard, [timecard_id])
-        self.db.commit()
-    return result
+    '''Marks an existing timecard as reported, returns False if it is still active
+    (or doesn't exist)'''
+    # Only finalized (inactive) timecards can be reported, checked by the update itself:
+    report_timecard = \
+    'update timecards set reported = current_timestamp where id = ? and not active'
+    reported = self.db.execute(report_timecard, [timecard_id]).rowcount > 0
+    commit()
+    return reported
 
 
-@require_database
 def get_timecard(timecard_id):
     '''Get a timecard record by its ID'''
     select_timecard = 'select * from timecards where id = ?'
     timecard = self.db.execute(select_timecard, [timecard_id]).fetchone()
     timecard = row_to_dict(timecard)
-    if timecard is not None:
-        timecard = convert_record_to_datetime(timecard)
     return timecard
 
 
-@require_database
 def get_all_timecards():
     '''Gets all active timecards'''
     select_timecards = 'select * from timecards'
     timecards = self.db.execute(select_timecards)
     timecards = rows_to_dicts(timecards)
-    if timecards is not None:
-        timecards = list(map(convert_record_to_datetime, timecards))
     return timecards
 
 
-@require_database
 def get_all_timecards_by_owner(owner):
     '''Gets all timecards associated with an owner'''
     select_timecards = 'select * from timecards where owner = ?'
     timecards = self.db.execute(select_timecards, [owner])
     timecards = rows_to_dicts(timecards)
-    if timecards is not None:
-        timecards = list(map(convert_record_to_datetime, timecards))
     return timecards
 
 
-@require_database
 def get_active_timecards(active=True):
     '''Gets all active timecards'''
     select_timecards = 'select * from timecards where active = ?'
     timecards = self.db.execute(select_timecards, [active])
     timecards = rows_to_dicts(timecards)
-    if timecards is not None:
-        timecards = list(map(convert_record_to_datetime, timecards))
     return timecards
 
 
-@require_database
 def get_active_timecards_by_owner(owner, active=True):
     '''Gets all active timecards associated with an owner'''
     select_timecards = 'select * from timecards where owner = ? and active = ?'
     timecards = self.db.execute(select_timecards, [owner, active])
     timecards = rows_to_dicts(timecards)
-    if timecards is not None:
-        timecards = list(map(convert_record_to_datetime, timecards))
     return timecards
 
 
-@require_database
 def punch_in(timecard_id, paid=True, descr=None):
     '''Records the time an employee starts their shift or other recorded time'''
     if descr is None:
@@ -271,20 +336,63 @@ def punch_in(timecard_id, paid=True, descr=None):
     punch_timecard = \
     'insert into punches(timecard, paid, descr, time_in) values (?, ?, ?, current_timestamp)'
     self.db.execute(deactivate_old_punches, [timecard_id])
-    self.db.execute(punch_timecard, [timecard_id, paid, descr])
-    self.db.commit()
-    return get_punch(get_active_punch_id(timecard_id))
+    punch_id = self.db.execute(punch_timecard, [timecard_id, paid, descr]).lastrowid
+    commit()
+    return get_punch(punch_id)
+
+
+def punch_bulk(timecard_id, punches):
+    '''Records a batch of already completed punches in one go, e.g. to backfill a timecard
+    Each punch is a (paid, descr, time_in, time_out) tuple, times may be given either as
+    datetimes or ISO 8601 strings (see datetime_to_sqlite_ts). Returns how many punches
+    were recorded (if any punch can't be recorded, none of them are)'''
+    insert_punch = \
+    'insert into punches(timecard, paid, descr, time_in, time_out, active) ' \
+    'values (?, ?, ?, ?, ?, false)'
+    # Descriptions default just as they do when punching in. Every row is converted before
+    # anything is written, so one bad time rejects the batch up front:
+    rows = [ (timecard_id, paid, 'Time Worked' if descr is None else descr,
+              datetime_to_sqlite_ts(time_in), datetime_to_sqlite_ts(time_out))
+             for paid, descr, time_in, time_out in punches ]
+    started = not self.db.in_transaction
+    if started:
+        self.db.execute('begin immediate')
+    # The batch goes in whole or not at all, even inside a transaction begin() started:
+    self.db.execute('savepoint punch_bulk')
+    try:
+        recorded = self.db.executemany(insert_punch, rows).rowcount
+    except BaseException:
+        self.db.execute('rollback to punch_bulk')
+        self.db.execute('release punch_bulk')
+        if started:
+            self.db.rollback()
+        raise
+    self.db.execute('release punch_bulk')
+    commit()
+    return recorded
 
 
-@require_database
 def punch_out(timecard_id):
     '''Records the time an employee ends their previous punch-in'''
     punch_timecard_out = \
     'update punches set time_out = current_timestamp, active = false where id = ?'
+    if self.has_returning:
+        # Find, close and return the active punch all in the one statement:
+        punch_active_out = '''
+        update punches set time_out = current_timestamp, active = false
+        where id = (select id from punches where timecard = ? and active = true
+                    order by time_in desc limit 1)
+        returning *
+        '''
+        punches = self.db.execute(punch_active_out, [timecard_id]).fetchall()
+        commit()
+        if not punches:
+            return None
+        return row_to_dict(punches[0])
     punch_id = get_active_punch_id(timecard_id)
     if punch_id:
         self.db.execute(punch_timecard_out, [punch_id])
-        self.db.commit()
+        commit()
     return get_punch(punch_id)
 
 
@@ -313,42 +421,34 @@ def get_time_worked_today(timecard_id):
 
 def get_paid_time_summary(timecard_id):
     '''Compiles a summary of all time worked from a specific set of timecard punches'''
-    completed_punches = get_completed_punches_by_timecard(timecard_id)
-    if not completed_punches:
-        return None
-    report = {}
+    # Completed paid punches are summed up by day, each day is dated by the time in of its
+    # first punch (a bare column of the row min(id) picks out):
+    summarize_paid_time = '''
+    select min(id), time_in, sum(strftime('%s', time_out) - strftime('%s', time_in)) as seconds
+    from punches
+    where time_out is not null and active = false and timecard = ? and paid = true
+    group by date(time_in, ?)
+    order by min(id)
+    '''
     # This will cause significant weirdness in the vicinity of DST:
     tz_offset_seconds = time.altzone if time.daylight else time.timezone
-    tz_offset = timedelta(seconds=tz_offset_seconds)
     # ...but the truth is there's not a better way to do this, and is
     # emblematic for why Daylight Savings Time NEEDS TO DIE.
-    for punch in completed_punches:
-        if not punch['paid']: # Lunch or break? Probably
-            continue
-        date_key = (punch['time_in'] - tz_offset).date().isoformat()
-        hours = None
-        if 'time_out' in punch and punch['time_out'] is not None:
-            hours = punch['time_out'] - punch['time_in']
-        else: # Whelp, didn't record the time!
-            hours = punch['time_in'] - punch['time_in']
-        if date_key in report:
-            report[date_key]['hours'] += hours
-        else:
-            report[date_key] = {
-                'date': punch['time_in'],
-                'hours': hours
-            }
-    return list(report.values())
+    day_shift = f'{-tz_offset_seconds} seconds'
+    days = self.db.execute(summarize_paid_time, [timecard_id, day_shift]).fetchall()
+    if not days:
+        return None
+    return [ {'date': day['time_in'], 'hours': timedelta(seconds=day['seconds'])}
+             for day in days ]
 
 
 # Internal timecard schema:
-@require_database
 def init_tables():
     '''Creates data tables required for the timecard recorder to work'''
-    query = 'select name from sqlite_master where name = ? and type = ?'
+    query = 'select name from sqlite_master where type = ?'
     required_tables = {
         'timecards': '''
-        CREATE TABLE timecards (
+        CREATE TABLE IF NOT EXISTS timecards (
             id integer primary key,
             owner varchar,
             descr varchar,
@@ -358,7 +458,7 @@ def init_tables():
         )
         ''',
         'punches': '''
-        CREATE TABLE punches (
+        CREATE TABLE IF NOT EXISTS punches (
             id integer primary key,
             timecard integer references timecards(id),
             descr varchar,
@@ -371,44 +471,114 @@ def init_tables():
     }
     required_indices = {
         'timecard_owner_idx': '''
-        CREATE INDEX timecard_owner_idx
+        CREATE INDEX IF NOT EXISTS timecard_owner_idx
         ON timecards(owner)
         ''',
         'timecard_active_owner_idx': '''
-        CREATE INDEX timecard_active_owner_idx
+        CREATE INDEX IF NOT EXISTS timecard_active_owner_idx
         ON timecards(owner, active)
         ''',
-        'active_punches_idx': '''
-        CREATE INDEX active_punches_idx 
-        ON punches(timecard, active)
-        ''',
+        # All of a timecard's punches in the order they were recorded:
         'punches_by_timecard_idx': '''
-        CREATE INDEX punches_by_timecard_idx
+        CREATE INDEX IF NOT EXISTS punches_by_timecard_idx
         ON punches(timecard)
-        '''
+        ''',
+        # Active and completed punches, newest active punch straight from the index:
+        'punches_active_time_idx': '''
+        CREATE INDEX IF NOT EXISTS punches_active_time_idx
+        ON punches(timecard, active, time_in)
+        ''',
+        # A timecard's last punch or today's punches, by time in:
+        'punches_time_idx': '''
+        CREATE INDEX IF NOT EXISTS punches_time_idx
+        ON punches(timecard, time_in)
+        ''',
+        # Paid (or unpaid) punches and the paid time summary:
+        'punches_paid_idx': '''
+        CREATE INDEX IF NOT EXISTS punches_paid_idx
+        ON punches(timecard, paid, active)
+        ''',
     }
+    # Indices superseded by the ones above, dropped from older databases:
+    retired_indices = ['active_punches_idx']
+    # Gather up whatever schema changes are needed and make them all in one transaction:
+    schema_changes = []
+    existing_tables = { row['name'] for row in self.db.execute(query, ['table']) }
+    existing_indices = { row['name'] for row in self.db.execute(query, ['index']) }
     for table_name, table_ddl in required_tables.items():
-        result = self.db.execute(query, [table_name, 'table']).fetchone()
-        if not result:
-            self.db.execute(table_ddl)
+        if table_name not in existing_tables:
+            schema_changes.append(table_ddl)
     for index_name, index_ddl in required_indices.items():
-        result = self.db.execute(query, [index_name, 'index']).fetchone()
-        if not result:
-            self.db.execute(index_ddl)
+        if index_name not in existing_indices:
+            schema_changes.append(index_ddl)
+    for index_name in retired_indices:
+        if index_name in existing_indices:
+            schema_changes.append(f'DROP INDEX {index_name}')
+    if schema_changes:
+        self.db.executescript('BEGIN;' + ';'.join(schema_changes) + ';COMMIT;')
+
+
+@contextmanager
+def batch():
+    '''Runs the enclosed queries in a single transaction, so a series of reads share one
+    lock and snapshot of the database instead of each starting their own'''
+    if self.db.in_transaction: # Already batched, nothing more to do
+        yield
+        return
+    self.db.execute('begin')
+    try:
+        yield
+    except BaseException:
+        self.db.rollback()
+        raise
     self.db.commit()
 
 
+def begin():
+    '''Holds back commits from the write functions until flush() is called, so a series of
+    punches can be written in one transaction (and synced to disk once)'''
+    if not self.db.in_transaction:
+        self.db.execute('begin immediate')
+    self.autocommit = False
+
+
+def flush():
+    '''Commits everything written since begin(), then goes back to committing each write'''
+    self.db.commit()
+    self.autocommit = True
+
+
 def open_timecard(filename = None):
-    '''Creates a SQLite database reference for time recording'''
+    '''Creates a SQLite database reference for time recording
+    Already open to the same database? Then the connection (and its page cache) is kept,
+    so applications can simply open their timecard once when they start'''
     if filename is None:
         filename = 'timecard.db'
-    self.db = sqlite3.connect(filename)
+    # In memory databases are new every time they're opened, everything else is a file:
+    path = filename if filename == ':memory:' else os.path.abspath(filename)
+    if path == self.filename and path != ':memory:':
+        return
+    # The one connection is shared by the whole module, so let any thread use it when the
+    # SQLite library serializes access itself (sqlite3 reports it as threadsafety 3):
+    self.db = sqlite3.connect(filename, detect_types=sqlite3.PARSE_DECLTYPES,
+        check_same_thread=sqlite3.threadsafety != 3)
     self.db.row_factory = sqlite3.Row
+    self.db.executescript(CONNECTION_PRAGMAS)
+    self.filename = path
+
+
+def get_connection():
+    '''Gets the database connection, opening the default timecard first if none is open'''
+    if isinstance(self.db, UninitializedDB):
+        open_timecard()
+    return self.db
 
 
 def close_timecard():
     '''Disconnects the database'''
     self.db.close()
+    self.db = UninitializedDB()
+    self.filename = None
 
 
 if __name__ == '__main__':
@@ -0,0 +1,176 @@
+#!/usr/bin/python3
+'''
+Timecard daemon: keeps timecard databases open between command line invocations
+
+Start it with ./timecardd.py, then set TIMECARD_DAEMON=1 for the timecard command to hand
+its command lines over to the daemon instead of opening the database itself. If the daemon
+can't be reached the command quietly falls back to running on its own.
+'''
+import os
+import sys
+import json
+import time
+import socket
+
+
+# Environment variables the command line depends on, passed along with each request
+# (TZ included, so times come out in the caller's timezone rather than the daemon's):
+CLIENT_ENV = ('TIMECARD_FILENAME', 'TIMECARD_USER', 'TZ')
+
+
+def socket_path():
+    '''Location of the daemon's socket, overridable with TIMECARD_SOCKET'''
+    return os.getenv('TIMECARD_SOCKET') or os.path.expanduser('~/.timecard.sock')
+
+
+def receive_all(conn):
+    '''Reads from a connection until the other end is done sending'''
+    chunks = []
+    while True:
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+
+def forward(argv):
+    '''Runs a command line on the daemon and prints its output
+    Returns the command's exit status, or None if the daemon could not be reached'''
+    request = {
+        'argv': argv,
+        'cwd': os.getcwd(),
+        'env': { name: os.getenv(name) for name in CLIENT_ENV },
+    }
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.connect(socket_path())
+            conn.sendall(json.dumps(request).encode())
+            conn.shutdown(socket.SHUT_WR)
+            reply = json.loads(receive_all(conn))
+    except (OSError, ValueError): # Unreachable, or it gave up on the command without replying
+        return None
+    sys.stdout.write(reply['stdout'])
+    sys.stderr.write(reply['stderr'])
+    return reply['status']
+
+
+class KeepOpenTimecard:
+    '''Stands in for the timecard module when running commands, keeping every database
+    that gets opened open (and its tables checked only once) for the next command'''
+    def __init__(self, timecard):
+        self.timecard = timecard
+        self.connections = {}
+
+    def __getattr__(self, name):
+        return getattr(self.timecard, name)
+
+    def open_timecard(self, filename=None):
+        '''Switches to the given database, only opening it the first time around'''
+        path = os.path.abspath(filename or 'timecard.db')
+        if path not in self.connections:
+            self.timecard.open_timecard(path)
+            self.timecard.init_tables()
+            self.connections[path] = self.timecard.db
+        self.timecard.db = self.connections[path]
+
+    def init_tables(self):
+        '''Already done when the database was first opened'''
+
+    def close_timecard(self):
+        '''Databases stay open until the daemon shuts down'''
+
+    def close_all(self):
+        '''Closes every database opened so far'''
+        for connection in self.connections.values():
+            connection.close()
+        self.connections = {}
+
+
+def run_command(interface, timecard, request):
+    '''Runs one command line as the timecard command would, capturing what it prints'''
+    import io
+    import traceback
+    from contextlib import redirect_stdout, redirect_stderr
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    status = 0
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        try:
+            # Run from where the command was given (which may no longer exist), and with its
+            # environment:
+            os.chdir(request['cwd'])
+            for name in CLIENT_ENV:
+                value = request['env'].get(name)
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+            time.tzset()
+            sys.argv = request['argv']
+            interface.main(timecard)
+        except SystemExit as exit_request:
+            status = exit_request.code
+            if status is None:
+                status = 0
+            elif not isinstance(status, int):
+                print(status, file=sys.stderr)
+                status = 1
+        except Exception: # Report it back, but keep the daemon going
+            traceback.print_exc()
+            status = 1
+    return { 'status': status, 'stdout': stdout.getvalue(), 'stderr': stderr.getvalue() }
+
+
+def serve():
+    '''Listens for command lines on the daemon's socket until interrupted'''
+    import signal
+    import traceback
+    import timecard
+    import interface
+    # Shut down cleanly when terminated too, not just when interrupted. A command under way
+    # is let finish first (exiting from the middle of one would be taken for the command's
+    # own exit and lost), the loop then stops after it:
+    running = stopping = False
+    def terminate(_signum, _frame):
+        nonlocal stopping
+        if not running:
+            raise KeyboardInterrupt
+        stopping = True
+    signal.signal(signal.SIGTERM, terminate)
+    # Commands run here, never hand them on (TIMECARD_DAEMON may well be exported in the
+    # shell the daemon was started from, forwarding to itself would hang it for good):
+    os.environ.pop('TIMECARD_DAEMON', None)
+    keep_open = KeepOpenTimecard(timecard)
+    path = socket_path()
+    if os.path.exists(path):
+        os.unlink(path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        # Only the user running the daemon gets to talk to it:
+        umask = os.umask(0o177)
+        try:
+            server.bind(path)
+        finally:
+            os.umask(umask)
+        server.listen()
+        try:
+            while not stopping:
+                conn, _ = server.accept()
+                running = True
+                with conn:
+                    try:
+                        request = json.loads(receive_all(conn))
+                        reply = run_command(interface, keep_open, request)
+                        conn.sendall(json.dumps(reply).encode())
+                    except Exception: # A bad or abandoned request, log it and carry on
+                        traceback.print_exc()
+                running = False
+        except KeyboardInterrupt:
+            pass
+        finally:
+            keep_open.close_all()
+            os.unlink(path)
+
+
+if __name__ == '__main__':
+    serve()